@@ -1,217 +1,299 @@
-# search_scorecard_fixed.py
-from playwright.sync_api import sync_playwright, TimeoutError as PlaywrightTimeoutError
-from urllib.parse import unquote, urlparse, parse_qs
-import time
-import sys
-
-QUERY = "sa vs ind final scorecard"
-
-# try multiple selectors for the search box / results
-SEARCH_BOX_SELECTORS = [
-    "input[name='q']",      # Google
-    "#sb_form_q",           # Bing common id
-    "input[type='search']",
-    "input[aria-label='Search']",
-    "input[role='search']"
-]
-
-RESULT_LINK_SELECTORS = [
-    "li.b_algo h2 a",       # Bing organic
-    ".b_algo a",            # fallback Bing
-    "a[href*='cricbuzz.com']",
-    "a[href*='espncricinfo.com']"
-]
-
-def extract_bing_redirect(href: str) -> str:
-    """
-    If href is a Bing redirect like /ck/a?...&u=<encodedURL>&..., extract and return decoded target.
-    Otherwise return original href.
-    """
-    if not href:
-        return href
-    try:
-        parsed = urlparse(href)
-        qs = parse_qs(parsed.query)
-        # look for 'u' param (common for Bing ck redirect)
-        if 'u' in qs and qs['u']:
-            return unquote(qs['u'][0])
-        # sometimes href contains 'u=' as substring
-        if 'u=' in href:
-            # crude fallback: find u= and split until & or end
-            start = href.find('u=') + 2
-            rest = href[start:]
-            end = rest.find('&')
-            if end != -1:
-                val = rest[:end]
-            else:
-                val = rest
-            return unquote(val)
-    except Exception:
-        pass
-    return href
-
-def main(headless: bool = False):
-    with sync_playwright() as p:
-        browser = p.chromium.launch(headless=headless, slow_mo=50)
-        context = browser.new_context(
-            viewport={"width": 1250, "height": 778},
-            user_agent=("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
-                        "(KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36"),
-            locale="en-US",
-            accept_downloads=True
-        )
-        page = context.new_page()
-
-        try:
-            search_url = "https://www.bing.com/search?q=" + QUERY.replace(" ", "+")
-            print("Going to", search_url)
-            page.goto(search_url, wait_until="domcontentloaded", timeout=60000)
-
-            # Accept cookie/consent if present (try a few texts)
-            try:
-                consent_selectors = [
-                    'button:has-text("I agree")',
-                    'button:has-text("I Accept")',
-                    'button:has-text("Accept all")',
-                    'button:has-text("Accept")',
-                    'button:has-text("Ok")',
-                    "button#bnp_btn_accept"
-                ]
-                for sel in consent_selectors:
-                    loc = page.locator(sel)
-                    if loc.count() > 0:
-                        print("Clicking consent button:", sel)
-                        loc.first.click(timeout=5000)
-                        page.wait_for_timeout(800)
-                        break
-            except Exception:
-                pass
-
-            # Wait for results container or at least for some result links
-            results_found = False
-            for sel in RESULT_LINK_SELECTORS:
-                try:
-                    page.wait_for_selector(sel, timeout=30000)
-                    results_found = True
-                    break
-                except PlaywrightTimeoutError:
-                    continue
-
-            if not results_found:
-                # fallback: wait a bit and grab the page HTML for debugging
-                print("No results selector matched. Saving HTML for debugging.")
-                ts = int(time.time())
-                html_file = f"bing_noresults_{ts}.html"
-                with open(html_file, "w", encoding="utf-8") as f:
-                    f.write(page.content())
-                print("Saved:", html_file)
-                browser.close()
-                return
-
-            # Collect candidate links (use multiple selectors)
-            results = page.locator(", ".join(RESULT_LINK_SELECTORS))
-            count = results.count()
-            print("Found result links:", count)
-            chosen_index = None
-            chosen_href = None
-            chosen_title = None
-
-            # Heuristics to pick a scorecard link
-            for i in range(count):
-                link = results.nth(i)
-                try:
-                    title = link.inner_text().strip()
-                except Exception:
-                    title = ""
-                try:
-                    href = link.get_attribute("href") or ""
-                except Exception:
-                    href = ""
-                low_href = (href or "").lower()
-                low_title = (title or "").lower()
-
-                if ("scorecard" in low_href) or ("scorecard" in low_title) \
-                   or ("espncricinfo" in low_href) or ("cricbuzz" in low_href) \
-                   or ("cricket" in low_title) or ("cricket" in low_href):
-                    chosen_index = i
-                    chosen_href = href
-                    chosen_title = title
-                    break
-
-            # fallback to first result
-            if chosen_index is None and count > 0:
-                chosen_index = 0
-                link0 = results.nth(0)
-                chosen_title = link0.inner_text().strip() if link0 else ""
-                chosen_href = link0.get_attribute("href") if link0 else ""
-
-            if chosen_index is None:
-                print("No suitable result found.")
-                browser.close()
-                return
-
-            print(f"Chosen result #{chosen_index + 1}: {chosen_title}")
-            print("Raw href:", chosen_href)
-
-            # If Bing uses ck/a redirect, extract actual target
-            target = extract_bing_redirect(chosen_href)
-            print("Resolved target:", target)
-
-            # If we have a resolved absolute URL, navigate directly (more reliable)
-            if target and (target.startswith("http://") or target.startswith("https://")):
-                try:
-                    page.goto(target, wait_until="networkidle", timeout=45000)
-                except PlaywrightTimeoutError:
-                    print("Navigation timeout on direct target; continuing to try clicking the link.")
-            else:
-                # otherwise click the link element (some links navigate via JS)
-                try:
-                    results.nth(chosen_index).scroll_into_view_if_needed()
-                    results.nth(chosen_index).click(timeout=20000)
-                except Exception as e:
-                    print("Click failed:", e)
-                    # fallback: try javascript navigation using href
-                    if chosen_href:
-                        try:
-                            page.evaluate("href => window.location.href = href", chosen_href)
-                        except Exception:
-                            pass
-
-            # Wait for page to load a bit
-            try:
-                page.wait_for_load_state("networkidle", timeout=30000)
-            except PlaywrightTimeoutError:
-                # still fine, continue to snapshot
-                pass
-
-            # give dynamic JS a moment
-            page.wait_for_timeout(1200)
-
-            ts = int(time.time())
-            screenshot_path = f"scorecard_{ts}.png"
-            page.screenshot(path=screenshot_path, full_page=True)
-            print("Screenshot saved to:", screenshot_path)
-
-            page_title = page.title()
-            page_url = page.url
-            print("Final page title:", page_title)
-            print("Final page URL:", page_url)
-
-            html_path = f"scorecard_{ts}.html"
-            with open(html_path, "w", encoding="utf-8") as f:
-                f.write(page.content())
-            print("HTML saved to:", html_path)
-
-        except PlaywrightTimeoutError as e:
-            print("A timeout occurred while performing steps:", str(e))
-        except Exception as e:
-            print("An unexpected error occurred:", str(e))
-        finally:
-            browser.close()
-
-
-if __name__ == "__main__":
-    headless_flag = False
-    if "--headless" in sys.argv:
-        headless_flag = True
-    main(headless=headless_flag)
+# search_scorecard_fixed.py
+from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
+from urllib.parse import unquote, urlencode, urlparse, parse_qsl
+import asyncio
+import functools
+import os
+import time
+import sys
+
+QUERY = "sa vs ind final scorecard"
+
+BING_SEARCH_URL = "https://www.bing.com/search?"
+
+# Resource types we never need while scraping the Bing results page
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+
+# Cookies (Bing consent etc.) persisted here so repeat runs skip the banner
+STATE_PATH = "bing_state.json"
+
+# try multiple selectors for the search box / results
+SEARCH_BOX_SELECTORS = [
+    "input[name='q']",      # Google
+    "#sb_form_q",           # Bing common id
+    "input[type='search']",
+    "input[aria-label='Search']",
+    "input[role='search']"
+]
+
+RESULT_LINK_SELECTORS = [
+    "li.b_algo h2 a",       # Bing organic
+    ".b_algo a",            # fallback Bing
+    "a[href*='cricbuzz.com']",
+    "a[href*='espncricinfo.com']"
+]
+
+CONSENT_SELECTORS = [
+    'button:has-text("I agree")',
+    'button:has-text("I Accept")',
+    'button:has-text("Accept all")',
+    'button:has-text("Accept")',
+    'button:has-text("Ok")',
+    "button#bnp_btn_accept"
+]
+
+# OR'd forms built once at import; joining per call and probing each selector
+# with its own count() round-trip added up on repeated runs
+RESULT_SEL_OR = ", ".join(RESULT_LINK_SELECTORS)
+CONSENT_SEL_OR = ", ".join(CONSENT_SELECTORS)
+
+# Keywords that mark a result as a likely scorecard link
+KEYWORDS = ("scorecard", "espncricinfo", "cricbuzz", "cricket")
+
+@functools.lru_cache(maxsize=1024)
+def extract_bing_redirect(href: str) -> str:
+    """
+    If href is a Bing redirect like /ck/a?...&u=<encodedURL>&..., extract and return decoded target.
+    Otherwise return original href.
+
+    Pure string -> string, so memoised: batched runs over many queries see
+    the same Bing footer/sidebar redirect shells repeatedly.
+    """
+    if not href:
+        return href
+    # Fast path: almost every href is already an absolute target URL, so a
+    # substring test avoids urlparse/query parsing entirely
+    if '/ck/a' not in href and 'u=' not in href:
+        return href
+    try:
+        parsed = urlparse(href)
+        # look for 'u' param (common for Bing ck redirect); parse_qsl lets us
+        # stop at the first hit without building a full dict of list-values.
+        # No max_num_fields: real /ck/a redirects carry 10+ params and the
+        # cap would raise ValueError, leaving the href unresolved.
+        for key, val in parse_qsl(parsed.query):
+            if key == 'u' and val:
+                return unquote(val)
+        # sometimes href contains 'u=' as substring
+        if 'u=' in href:
+            # crude fallback: find u= and split until & or end
+            start = href.find('u=') + 2
+            rest = href[start:]
+            end = rest.find('&')
+            if end != -1:
+                val = rest[:end]
+            else:
+                val = rest
+            return unquote(val)
+    except Exception:
+        pass
+    return href
+
+async def new_bing_context(browser):
+    """
+    Create a context preloaded with saved cookies (if any), so repeat runs
+    start with Bing consent already accepted.
+    """
+    return await browser.new_context(
+        viewport={"width": 1250, "height": 778},
+        user_agent=("Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                    "(KHTML, like Gecko) Chrome/117.0.0.0 Safari/537.36"),
+        locale="en-US",
+        accept_downloads=True,
+        storage_state=STATE_PATH if os.path.exists(STATE_PATH) else None
+    )
+
+async def search_one(context, query: str, save_html: bool = False,
+                     consent_needed: bool = True):
+    """
+    Run one search+screenshot on its own page. Pages share the browser and
+    context, so N of these gathered concurrently overlap their network waits.
+    """
+    page = await context.new_page()
+    # tag for filenames and logs when several queries run at once
+    slug = query.replace(" ", "_")
+
+    try:
+        # We only need hrefs from the SERP, so skip images/fonts/media/CSS
+        # there; the block is lifted before navigating to the scorecard page
+        # because the screenshot should keep its styling.
+        async def _block_heavy(route):
+            if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+                await route.abort()
+            else:
+                await route.continue_()
+
+        await page.route("**/*", _block_heavy)
+
+        # urlencode percent-encodes &, # and non-ASCII; the old replace(" ", "+")
+        # silently mangled any query needing real escaping
+        search_url = BING_SEARCH_URL + urlencode({"q": query})
+        print("Going to", search_url)
+        await page.goto(search_url, wait_until="domcontentloaded", timeout=60000)
+
+        # Accept cookie/consent if present: one OR'd locator instead of
+        # probing each selector with its own count() round-trip. Bing only
+        # shows the banner on a fresh context, so skip even that when the
+        # context was restored from saved cookies.
+        if consent_needed:
+            try:
+                await page.locator(CONSENT_SEL_OR).first.click(timeout=2000)
+                print("Clicked consent button.")
+            except Exception:
+                pass
+
+        # Wait for any of the result links with a single OR'd selector
+        results_found = True
+        try:
+            await page.wait_for_selector(RESULT_SEL_OR, timeout=30000)
+        except PlaywrightTimeoutError:
+            results_found = False
+
+        if not results_found:
+            # fallback: wait a bit and grab the page HTML for debugging
+            print("No results selector matched. Saving HTML for debugging.")
+            ts = int(time.time())
+            html_file = f"bing_noresults_{slug}_{ts}.html"
+            with open(html_file, "w", encoding="utf-8") as f:
+                f.write(await page.content())
+            print("Saved:", html_file)
+            return
+
+        # Collect candidate links in one JS evaluation instead of two
+        # Playwright round-trips (inner_text + get_attribute) per link
+        results = page.locator(RESULT_SEL_OR)
+        entries = await page.evaluate(
+            "sels => Array.from(document.querySelectorAll(sels))"
+            ".map(a => ({href: a.href || '', title: (a.innerText || '').trim()}))",
+            RESULT_SEL_OR
+        )
+        count = len(entries)
+        print("Found result links:", count)
+
+        # Heuristic pick: first entry whose href/title mentions a keyword,
+        # falling back to the first result. All local string work, no IPC.
+        chosen_index = next(
+            (i for i, e in enumerate(entries)
+             if any(k in e.get("href", "").lower() or k in e.get("title", "").lower()
+                    for k in KEYWORDS)),
+            0 if entries else None
+        )
+
+        if chosen_index is None:
+            print("No suitable result found.")
+            return
+
+        chosen_href = entries[chosen_index].get("href", "")
+        chosen_title = entries[chosen_index].get("title", "")
+
+        print(f"Chosen result #{chosen_index + 1}: {chosen_title}")
+        print("Raw href:", chosen_href)
+
+        # If Bing uses ck/a redirect, extract actual target
+        target = extract_bing_redirect(chosen_href)
+        print("Resolved target:", target)
+
+        # Lift the resource block so the scorecard renders fully for the shot
+        await page.unroute("**/*", _block_heavy)
+
+        # If we have a resolved absolute URL, navigate directly (more reliable)
+        if target and (target.startswith("http://") or target.startswith("https://")):
+            try:
+                # networkidle never fires on scorecard pages with long-poll
+                # analytics; domcontentloaded + a targeted selector wait is
+                # faster and deterministic
+                await page.goto(target, wait_until="domcontentloaded", timeout=45000)
+            except PlaywrightTimeoutError:
+                print("Navigation timeout on direct target; continuing to try clicking the link.")
+        else:
+            # otherwise click the link element (some links navigate via JS)
+            try:
+                await results.nth(chosen_index).scroll_into_view_if_needed()
+                await results.nth(chosen_index).click(timeout=20000)
+            except Exception as e:
+                print("Click failed:", e)
+                # fallback: try javascript navigation using href
+                if chosen_href:
+                    try:
+                        await page.evaluate("href => window.location.href = href", chosen_href)
+                    except Exception:
+                        pass
+
+        # Wait for the scorecard content itself rather than network quiet
+        try:
+            await page.wait_for_selector(
+                ".cb-col.cb-scrd-itms, .ds-scorecard-table, h1",
+                timeout=15000
+            )
+        except PlaywrightTimeoutError:
+            # still fine, continue to snapshot
+            pass
+
+        ts = int(time.time())
+        screenshot_path = f"scorecard_{slug}_{ts}.png"
+        # viewport-only: a full-page capture of a scorecard can be 4000-8000px
+        # tall, which is slow to rasterise/encode and tens of MB of RAM in
+        # Chromium; the scorecard we care about is above the fold
+        await page.screenshot(path=screenshot_path, full_page=False)
+        print("Screenshot saved to:", screenshot_path)
+
+        page_title = await page.title()
+        page_url = page.url
+        print("Final page title:", page_title)
+        print("Final page URL:", page_url)
+
+        # Optional: page.content() builds the whole DOM as one Python str,
+        # so only snapshot when asked, and via CDP MHTML which skips the
+        # innerHTML round-trip and bundles resources in one file
+        if save_html:
+            html_path = f"scorecard_{slug}_{ts}.mhtml"
+            cdp = await context.new_cdp_session(page)
+            snapshot = await cdp.send("Page.captureSnapshot", {"format": "mhtml"})
+            with open(html_path, "w", encoding="utf-8") as f:
+                f.write(snapshot["data"])
+            print("Snapshot saved to:", html_path)
+
+    except PlaywrightTimeoutError as e:
+        print("A timeout occurred while performing steps:", str(e))
+    except Exception as e:
+        print("An unexpected error occurred:", str(e))
+    finally:
+        await page.close()
+
+async def main(headless: bool = False, queries=None, save_html: bool = False):
+    queries = queries or [QUERY]
+    async with async_playwright() as p:
+        # no slow_mo: every Playwright command already round-trips to Chromium,
+        # so an artificial 50ms delay per command dominated the run time
+        browser = await p.chromium.launch(headless=headless)
+        context = await new_bing_context(browser)
+        try:
+            # Bing sets MUID on any successful visit; if the restored context
+            # already has it, the consent banner won't appear again
+            cookies = await context.cookies("https://www.bing.com")
+            consent_needed = not any(c["name"].startswith("MUID") for c in cookies)
+
+            # One browser, one context, one page per query: the network-bound
+            # goto/selector waits overlap instead of serialising
+            await asyncio.gather(
+                *(search_one(context, q, save_html=save_html,
+                             consent_needed=consent_needed) for q in queries)
+            )
+            # Persist cookies (consent etc.) so the next run skips the banner
+            try:
+                await context.storage_state(path=STATE_PATH)
+            except Exception:
+                pass
+        finally:
+            await browser.close()
+
+
+if __name__ == "__main__":
+    headless_flag = "--headless" in sys.argv
+    # any non-flag arguments are extra queries to run concurrently
+    extra_queries = [a for a in sys.argv[1:] if not a.startswith("--")]
+    asyncio.run(main(
+        headless=headless_flag,
+        queries=extra_queries or None,
+        save_html="--save-html" in sys.argv
+    ))
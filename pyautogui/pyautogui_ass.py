@@ -1,13 +1,19 @@
 
 # send_on_click.py
+import queue
 import time
 import threading
 import pyautogui
+import pyperclip
 from pynput import mouse, keyboard
 
 # Configuration
 MESSAGE = """`Hi  Team"""
 SEND_ON = 'left'   # 'left' or 'right' (which mouse button triggers sending)
+
+# Resolve the trigger once; on_click runs for every mouse event system-wide,
+# so an enum identity check beats attribute lookup + string compare there
+_TRIGGER_BUTTON = mouse.Button.left if SEND_ON == 'left' else mouse.Button.right
 DEBOUNCE_SECONDS = 0.35  # ignore clicks that happen faster than this (prevents accidental double-sends)
 
 # PyAutoGUI safety and timing
@@ -15,38 +21,61 @@ pyautogui.FAILSAFE = True
 pyautogui.PAUSE = 0.05
 
 _last_send_time = 0.0
-_stop_flag = False 
+_stop_flag = False
+_mouse_listener = None  # set in main so the Esc handler can stop it directly
 
 def send_message():
 
-   
     time.sleep(0.08)
-    pyautogui.typewrite(MESSAGE, interval=0.02)  
-    pyautogui.press('enter')                    
+    # Paste is one keystroke no matter how long MESSAGE is; typewrite was
+    # 20ms per character and blocked the worker for the whole message
+    pyperclip.copy(MESSAGE)
+    old_pause = pyautogui.PAUSE
+    pyautogui.PAUSE = 0
+    try:
+        pyautogui.hotkey('ctrl', 'v')
+        pyautogui.press('enter')
+    finally:
+        pyautogui.PAUSE = old_pause
+
+# One long-lived worker drains the queue instead of spawning a thread per
+# click; also keeps back-to-back sends from interleaving their keystrokes.
+_send_q = queue.Queue()
+
+def _send_worker():
+    # a None in the queue is the shutdown signal
+    for _ in iter(_send_q.get, None):
+        send_message()
+
+threading.Thread(target=_send_worker, daemon=True).start()
 
 def on_click(x, y, button, pressed):
     """
     Mouse callback. We act only on button press (not release).
     """
     global _last_send_time, _stop_flag
-    if _stop_flag:
-        return False  # stop listener if flagged
-
+    # Cheapest rejections first: every press has a matching release, so
+    # dropping release events up front halves the work done per click
     if not pressed:
         return  # only handle press events
 
     # Only trigger for the configured button
-    if button.name != SEND_ON:
+    if button is not _TRIGGER_BUTTON:
         return
 
-    now = time.time()
+    if _stop_flag:
+        return False  # stop listener if flagged
+
+    # monotonic: time.time() can jump backwards under NTP adjustment,
+    # which would break the debounce window
+    now = time.monotonic()
     if now - _last_send_time < DEBOUNCE_SECONDS:
         # ignore rapid successive clicks
         return
     _last_send_time = now
 
-    # Run sending in a separate thread to avoid blocking the listener
-    threading.Thread(target=send_message, daemon=True).start()
+    # Hand off to the worker thread so the listener callback stays fast
+    _send_q.put_nowait(1)
 
 def on_press(key):
     """
@@ -57,7 +86,9 @@ def on_press(key):
         if key == keyboard.Key.esc:
             print("Esc pressed — stopping listener.")
             _stop_flag = True
-            # returning False from listener's stop method will be handled in main
+            # stop the mouse listener too so main's join() returns
+            if _mouse_listener is not None:
+                _mouse_listener.stop()
             return False
     except AttributeError:
         pass
@@ -71,12 +102,15 @@ def main():
     keyboard_listener.start()
 
     # Start mouse listener (this will block until stopped)
+    global _mouse_listener
     with mouse.Listener(on_click=on_click) as mouse_listener:
-        # Keep running while listeners are alive and not flagged to stop
-        while mouse_listener.running and not _stop_flag:
-            time.sleep(0.1)
+        _mouse_listener = mouse_listener
+        # join() sleeps in the kernel until the listener stops, instead of
+        # waking the main thread 10x a second to poll .running
+        mouse_listener.join()
 
     keyboard_listener.stop()
+    _send_q.put(None)  # let the send worker exit
     print("Program exited.")
 
 if __name__ == "__main__":